@@ -15,376 +15,444 @@ Usage:
 """
 
 import logging
-from typing import Dict, List, Any, Optional
-import json
+from typing import Dict, List, Any, NamedTuple, Optional, Tuple
+import gzip
+import hashlib
+from functools import lru_cache
+
+import orjson
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 logger = logging.getLogger(__name__)
 
+# Liveness probes hit /health constantly; its body never changes
+_HEALTH_BYTES = b'{"status":"healthy"}'
 
-def get_openapi_spec(
-    title: str = "ComfyUI API",
-    version: str = "0.3.67",
-    description: str = "Visual AI engine for Stable Diffusion workflows",
-    base_url: str = "http://localhost:8188"
-) -> Dict[str, Any]:
-    """
-    Generate OpenAPI 3.0 specification
 
-    Returns:
-        OpenAPI specification dictionary
+@lru_cache(maxsize=64)
+def _pick_encoding(accept_encoding: str, available: Tuple[str, ...]) -> Optional[str]:
     """
+    First of the available encodings an Accept-Encoding header allows
 
-    spec = {
-        "openapi": "3.0.0",
-        "info": {
-            "title": title,
-            "version": version,
-            "description": description,
-            "contact": {
-                "name": "ComfyUI Project",
-                "url": "https://github.com/comfyanonymous/ComfyUI",
-                "email": "support@comfy.org"
-            },
-            "license": {
-                "name": "GPL-3.0",
-                "url": "https://www.gnu.org/licenses/gpl-3.0.html"
+    Names are compared exactly (case-insensitively) and q=0 rules an
+    encoding out, as does "*;q=0" for any encoding not listed by name.
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(','):
+        name, *params = item.split(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+
+    for encoding in available:
+        if weights.get(encoding, weights.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+class _Endpoint(NamedTuple):
+    """Compact description of one API operation"""
+
+    method: str
+    path: str
+    tag: str
+    summary: str
+    description: str
+    operation_id: str
+    ok_description: str
+    response_schema: Optional[Dict[str, Any]] = None
+    request_schema: Optional[Dict[str, Any]] = None
+    request_example: Optional[Dict[str, Any]] = None
+    security: Optional[List[Dict[str, List[str]]]] = None
+    error_responses: Optional[Dict[str, str]] = None
+
+
+def _json_content(schema: Dict[str, Any],
+                  example: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Wrap a schema in an application/json content object"""
+    media_type: Dict[str, Any] = {"schema": schema}
+    if example is not None:
+        media_type["example"] = example
+    return {"application/json": media_type}
+
+
+def _build_operation(endpoint: _Endpoint) -> Dict[str, Any]:
+    """Expand an endpoint description into an OpenAPI operation object"""
+    operation: Dict[str, Any] = {
+        "tags": [endpoint.tag],
+        "summary": endpoint.summary,
+        "description": endpoint.description,
+        "operationId": endpoint.operation_id,
+    }
+    if endpoint.security is not None:
+        operation["security"] = endpoint.security
+    if endpoint.request_schema is not None:
+        operation["requestBody"] = {
+            "required": True,
+            "content": _json_content(endpoint.request_schema,
+                                     endpoint.request_example)
+        }
+
+    ok_response: Dict[str, Any] = {"description": endpoint.ok_description}
+    if endpoint.response_schema is not None:
+        ok_response["content"] = _json_content(endpoint.response_schema)
+    responses = {"200": ok_response}
+    for status, description in (endpoint.error_responses or {}).items():
+        responses[status] = {"description": description}
+    operation["responses"] = responses
+
+    return operation
+
+
+_ENDPOINTS: List[_Endpoint] = [
+    # Authentication endpoints
+    _Endpoint(
+        "POST", "/api/auth/login", "Authentication",
+        "User login", "Authenticate user and get JWT token", "loginUser",
+        "Login successful",
+        response_schema={
+            "type": "object",
+            "properties": {
+                "token": {
+                    "type": "string",
+                    "example": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9..."
+                },
+                "user_id": {
+                    "type": "string"
+                },
+                "token_type": {
+                    "type": "string",
+                    "example": "Bearer"
+                }
             }
         },
-        "servers": [
-            {
-                "url": base_url,
-                "description": "Development server"
-            }
-        ],
-        "paths": {
-            # Authentication endpoints
-            "/api/auth/login": {
-                "post": {
-                    "tags": ["Authentication"],
-                    "summary": "User login",
-                    "description": "Authenticate user and get JWT token",
-                    "operationId": "loginUser",
-                    "requestBody": {
-                        "required": True,
-                        "content": {
-                            "application/json": {
-                                "schema": {
-                                    "type": "object",
-                                    "properties": {
-                                        "username": {
-                                            "type": "string",
-                                            "example": "user@example.com"
-                                        },
-                                        "password": {
-                                            "type": "string",
-                                            "format": "password",
-                                            "example": "password123"
-                                        }
-                                    },
-                                    "required": ["username", "password"]
-                                }
-                            }
-                        }
-                    },
-                    "responses": {
-                        "200": {
-                            "description": "Login successful",
-                            "content": {
-                                "application/json": {
-                                    "schema": {
-                                        "type": "object",
-                                        "properties": {
-                                            "token": {
-                                                "type": "string",
-                                                "example": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9..."
-                                            },
-                                            "user_id": {
-                                                "type": "string"
-                                            },
-                                            "token_type": {
-                                                "type": "string",
-                                                "example": "Bearer"
-                                            }
-                                        }
-                                    }
-                                }
-                            }
-                        },
-                        "400": {
-                            "description": "Invalid credentials"
-                        }
-                    }
-                }
-            },
-
-            "/api/auth/logout": {
-                "post": {
-                    "tags": ["Authentication"],
-                    "summary": "User logout",
-                    "description": "Logout user and revoke token",
-                    "operationId": "logoutUser",
-                    "security": [
-                        {"bearerAuth": []}
-                    ],
-                    "responses": {
-                        "200": {
-                            "description": "Logout successful"
-                        },
-                        "401": {
-                            "description": "Unauthorized"
-                        }
-                    }
-                }
-            },
-
-            # Workflow endpoints
-            "/prompt": {
-                "post": {
-                    "tags": ["Workflows"],
-                    "summary": "Submit workflow",
-                    "description": "Submit a workflow to the execution queue",
-                    "operationId": "submitWorkflow",
-                    "requestBody": {
-                        "required": True,
-                        "content": {
-                            "application/json": {
-                                "schema": {
-                                    "type": "object",
-                                    "properties": {
-                                        "prompt": {
-                                            "type": "object",
-                                            "description": "Graph of nodes to execute",
-                                            "additionalProperties": {
-                                                "type": "object",
-                                                "properties": {
-                                                    "class_type": {"type": "string"},
-                                                    "inputs": {"type": "object"}
-                                                },
-                                                "required": ["class_type", "inputs"]
-                                            }
-                                        }
-                                    },
-                                    "required": ["prompt"]
-                                },
-                                "example": {
-                                    "prompt": {
-                                        "1": {
-                                            "class_type": "CheckpointLoaderSimple",
-                                            "inputs": {
-                                                "ckpt_name": "v1-5-pruned-emaonly.safetensors"
-                                            }
-                                        }
-                                    }
-                                }
-                            }
-                        }
-                    },
-                    "responses": {
-                        "200": {
-                            "description": "Workflow submitted",
-                            "content": {
-                                "application/json": {
-                                    "schema": {
-                                        "type": "object",
-                                        "properties": {
-                                            "prompt_id": {"type": "string"},
-                                            "number": {"type": "integer"},
-                                            "node_errors": {"type": "object"}
-                                        }
-                                    }
-                                }
-                            }
-                        }
-                    }
+        request_schema={
+            "type": "object",
+            "properties": {
+                "username": {
+                    "type": "string",
+                    "example": "user@example.com"
                 },
-                "get": {
-                    "tags": ["Workflows"],
-                    "summary": "Get queue status",
-                    "description": "Get current execution queue status",
-                    "operationId": "getQueueStatus",
-                    "responses": {
-                        "200": {
-                            "description": "Queue status",
-                            "content": {
-                                "application/json": {
-                                    "schema": {
-                                        "type": "object",
-                                        "properties": {
-                                            "exec_info": {
-                                                "type": "object",
-                                                "properties": {
-                                                    "queue_remaining": {"type": "integer"}
-                                                }
-                                            }
-                                        }
-                                    }
-                                }
-                            }
-                        }
-                    }
+                "password": {
+                    "type": "string",
+                    "format": "password",
+                    "example": "password123"
                 }
             },
-
-            "/history": {
-                "get": {
-                    "tags": ["Workflows"],
-                    "summary": "Get execution history",
-                    "description": "Get history of executed workflows",
-                    "operationId": "getHistory",
-                    "responses": {
-                        "200": {
-                            "description": "Execution history",
-                            "content": {
-                                "application/json": {
-                                    "schema": {
-                                        "type": "object",
-                                        "additionalProperties": {
-                                            "type": "object"
-                                        }
-                                    }
-                                }
-                            }
-                        }
+            "required": ["username", "password"]
+        },
+        error_responses={"400": "Invalid credentials"}
+    ),
+    _Endpoint(
+        "POST", "/api/auth/logout", "Authentication",
+        "User logout", "Logout user and revoke token", "logoutUser",
+        "Logout successful",
+        security=[{"bearerAuth": []}],
+        error_responses={"401": "Unauthorized"}
+    ),
+
+    # Workflow endpoints
+    _Endpoint(
+        "POST", "/prompt", "Workflows",
+        "Submit workflow", "Submit a workflow to the execution queue",
+        "submitWorkflow",
+        "Workflow submitted",
+        response_schema={
+            "type": "object",
+            "properties": {
+                "prompt_id": {"type": "string"},
+                "number": {"type": "integer"},
+                "node_errors": {"type": "object"}
+            }
+        },
+        request_schema={
+            "type": "object",
+            "properties": {
+                "prompt": {
+                    "type": "object",
+                    "description": "Graph of nodes to execute",
+                    "additionalProperties": {
+                        "type": "object",
+                        "properties": {
+                            "class_type": {"type": "string"},
+                            "inputs": {"type": "object"}
+                        },
+                        "required": ["class_type", "inputs"]
                     }
                 }
             },
-
-            # System endpoints
-            "/api/nodes": {
-                "get": {
-                    "tags": ["System"],
-                    "summary": "Get available nodes",
-                    "description": "Get list of available nodes and their specifications",
-                    "operationId": "getNodes",
-                    "responses": {
-                        "200": {
-                            "description": "Available nodes",
-                            "content": {
-                                "application/json": {
-                                    "schema": {
-                                        "type": "object",
-                                        "additionalProperties": {
-                                            "type": "object"
-                                        }
-                                    }
-                                }
-                            }
-                        }
+            "required": ["prompt"]
+        },
+        request_example={
+            "prompt": {
+                "1": {
+                    "class_type": "CheckpointLoaderSimple",
+                    "inputs": {
+                        "ckpt_name": "v1-5-pruned-emaonly.safetensors"
                     }
                 }
-            },
-
-            "/api/models": {
-                "get": {
-                    "tags": ["System"],
-                    "summary": "Get available models",
-                    "description": "Get list of available model checkpoints",
-                    "operationId": "getModels",
-                    "responses": {
-                        "200": {
-                            "description": "Available models",
-                            "content": {
-                                "application/json": {
-                                    "schema": {
-                                        "type": "object"
-                                    }
-                                }
-                            }
-                        }
+            }
+        }
+    ),
+    _Endpoint(
+        "GET", "/prompt", "Workflows",
+        "Get queue status", "Get current execution queue status",
+        "getQueueStatus",
+        "Queue status",
+        response_schema={
+            "type": "object",
+            "properties": {
+                "exec_info": {
+                    "type": "object",
+                    "properties": {
+                        "queue_remaining": {"type": "integer"}
                     }
                 }
+            }
+        }
+    ),
+    _Endpoint(
+        "GET", "/history", "Workflows",
+        "Get execution history", "Get history of executed workflows",
+        "getHistory",
+        "Execution history",
+        response_schema={
+            "type": "object",
+            "additionalProperties": {
+                "type": "object"
+            }
+        }
+    ),
+
+    # System endpoints
+    _Endpoint(
+        "GET", "/api/nodes", "System",
+        "Get available nodes",
+        "Get list of available nodes and their specifications",
+        "getNodes",
+        "Available nodes",
+        response_schema={
+            "type": "object",
+            "additionalProperties": {
+                "type": "object"
+            }
+        }
+    ),
+    _Endpoint(
+        "GET", "/api/models", "System",
+        "Get available models", "Get list of available model checkpoints",
+        "getModels",
+        "Available models",
+        response_schema={
+            "type": "object"
+        }
+    ),
+    _Endpoint(
+        "GET", "/health", "System",
+        "Health check", "Check if server is running", "healthCheck",
+        "Server is healthy",
+        response_schema={
+            "type": "object",
+            "properties": {
+                "status": {"type": "string"}
+            }
+        }
+    ),
+]
+
+
+def _build_paths(endpoints: List[_Endpoint]) -> Dict[str, Any]:
+    """Group endpoint operations by path"""
+    paths: Dict[str, Dict[str, Any]] = {}
+    for endpoint in endpoints:
+        paths.setdefault(endpoint.path, {})[endpoint.method.lower()] = \
+            _build_operation(endpoint)
+    return paths
+
+
+# Static part of the specification, built once at import. get_openapi_spec
+# only overlays the info fields and server URL on top of it.
+_SPEC_TEMPLATE: Dict[str, Any] = {
+    "openapi": "3.0.0",
+    "info": {
+        "contact": {
+            "name": "ComfyUI Project",
+            "url": "https://github.com/comfyanonymous/ComfyUI",
+            "email": "support@comfy.org"
+        },
+        "license": {
+            "name": "GPL-3.0",
+            "url": "https://www.gnu.org/licenses/gpl-3.0.html"
+        }
+    },
+    "servers": [
+        {
+            "description": "Development server"
+        }
+    ],
+    "paths": _build_paths(_ENDPOINTS),
+    "components": {
+        "securitySchemes": {
+            "bearerAuth": {
+                "type": "http",
+                "scheme": "bearer",
+                "bearerFormat": "JWT"
             },
-
-            "/health": {
-                "get": {
-                    "tags": ["System"],
-                    "summary": "Health check",
-                    "description": "Check if server is running",
-                    "operationId": "healthCheck",
-                    "responses": {
-                        "200": {
-                            "description": "Server is healthy",
-                            "content": {
-                                "application/json": {
-                                    "schema": {
-                                        "type": "object",
-                                        "properties": {
-                                            "status": {"type": "string"}
-                                        }
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }
+            "apiKey": {
+                "type": "apiKey",
+                "in": "header",
+                "name": "X-API-Key"
             }
         },
-        "components": {
-            "securitySchemes": {
-                "bearerAuth": {
-                    "type": "http",
-                    "scheme": "bearer",
-                    "bearerFormat": "JWT"
-                },
-                "apiKey": {
-                    "type": "apiKey",
-                    "in": "header",
-                    "name": "X-API-Key"
+        "schemas": {
+            "Error": {
+                "type": "object",
+                "properties": {
+                    "error": {"type": "string"},
+                    "message": {"type": "string"},
+                    "details": {"type": "string"}
                 }
             },
-            "schemas": {
-                "Error": {
-                    "type": "object",
-                    "properties": {
-                        "error": {"type": "string"},
-                        "message": {"type": "string"},
-                        "details": {"type": "string"}
+            "Node": {
+                "type": "object",
+                "properties": {
+                    "class_type": {"type": "string"},
+                    "display_name": {"type": "string"},
+                    "category": {"type": "string"},
+                    "input_types": {"type": "object"},
+                    "return_types": {
+                        "type": "array",
+                        "items": {"type": "string"}
                     }
-                },
-                "Node": {
+                }
+            },
+            "WorkflowPrompt": {
+                "type": "object",
+                "additionalProperties": {
                     "type": "object",
                     "properties": {
                         "class_type": {"type": "string"},
-                        "display_name": {"type": "string"},
-                        "category": {"type": "string"},
-                        "input_types": {"type": "object"},
-                        "return_types": {
-                            "type": "array",
-                            "items": {"type": "string"}
-                        }
-                    }
-                },
-                "WorkflowPrompt": {
-                    "type": "object",
-                    "additionalProperties": {
-                        "type": "object",
-                        "properties": {
-                            "class_type": {"type": "string"},
-                            "inputs": {"type": "object"}
-                        }
+                        "inputs": {"type": "object"}
                     }
                 }
             }
+        }
+    },
+    "tags": [
+        {
+            "name": "Authentication",
+            "description": "User authentication and token management"
         },
-        "tags": [
-            {
-                "name": "Authentication",
-                "description": "User authentication and token management"
-            },
-            {
-                "name": "Workflows",
-                "description": "Workflow execution and management"
-            },
-            {
-                "name": "System",
-                "description": "System information and node management"
-            }
-        ]
+        {
+            "name": "Workflows",
+            "description": "Workflow execution and management"
+        },
+        {
+            "name": "System",
+            "description": "System information and node management"
+        }
+    ]
+}
+
+
+@lru_cache(maxsize=8)
+def get_openapi_spec(
+    title: str = "ComfyUI API",
+    version: str = "0.3.67",
+    description: str = "Visual AI engine for Stable Diffusion workflows",
+    base_url: str = "http://localhost:8188"
+) -> Dict[str, Any]:
+    """
+    Generate OpenAPI 3.0 specification
+
+    The result is memoized per argument combination and shared between
+    callers, so treat it as read-only (copy.deepcopy it before modifying).
+
+    Returns:
+        OpenAPI specification dictionary
+    """
+
+    spec = dict(_SPEC_TEMPLATE)
+    spec["info"] = {
+        "title": title,
+        "version": version,
+        "description": description,
+        **_SPEC_TEMPLATE["info"]
     }
+    spec["servers"] = [
+        {"url": base_url, **server} for server in _SPEC_TEMPLATE["servers"]
+    ]
 
     return spec
 
 
+# Operation objects encoded once at import, for splicing into encoded specs
+_OPERATION_BYTES: List[Tuple[_Endpoint, bytes]] = [
+    (endpoint, orjson.dumps(_build_operation(endpoint)))
+    for endpoint in _ENDPOINTS
+]
+
+
+@lru_cache(maxsize=8)
+def get_openapi_spec_bytes(
+    title: str = "ComfyUI API",
+    version: str = "0.3.67",
+    description: str = "Visual AI engine for Stable Diffusion workflows",
+    base_url: str = "http://localhost:8188",
+    tags: Optional[Tuple[str, ...]] = None
+) -> bytes:
+    """
+    Generate OpenAPI 3.0 specification as compact JSON bytes
+
+    Path operations are spliced in from fragments encoded at import, so
+    only the surrounding document is serialized per call.
+
+    Args:
+        tags: Only include operations with one of these tags (None for all)
+
+    Returns:
+        Encoded OpenAPI specification
+    """
+
+    spec = get_openapi_spec(title, version, description, base_url)
+
+    paths: Dict[str, List[bytes]] = {}
+    for endpoint, operation in _OPERATION_BYTES:
+        if tags is None or endpoint.tag in tags:
+            paths.setdefault(endpoint.path, []).append(
+                orjson.dumps(endpoint.method.lower()) + b':' + operation
+            )
+    paths_bytes = b','.join(
+        orjson.dumps(path) + b':{' + b','.join(operations) + b'}'
+        for path, operations in paths.items()
+    )
+
+    head = orjson.dumps({
+        key: spec[key] for key in ("openapi", "info", "servers")
+    })
+    tail = orjson.dumps({
+        "components": spec["components"],
+        "tags": [
+            tag for tag in spec["tags"] if tags is None or tag["name"] in tags
+        ]
+    })
+
+    return head[:-1] + b',"paths":{' + paths_bytes + b'},' + tail[1:]
+
+
 def get_swagger_ui_html(spec_url: str = "/api/openapi.json") -> str:
     """
     Generate Swagger UI HTML
@@ -467,25 +535,63 @@ def setup_openapi_routes(app):
     """
     from aiohttp import web
 
-    spec = get_openapi_spec()
+    # The spec is static, so serialize it (and the docs pages) once at setup
+    spec_bytes = get_openapi_spec_bytes()
+    spec_digest = hashlib.md5(spec_bytes, usedforsecurity=False).hexdigest()
+    swagger_html = get_swagger_ui_html()
+    redoc_html = get_redoc_html()
+
+    # Compress once up front, in order of preference
+    compressed = [('gzip', gzip.compress(spec_bytes, compresslevel=9))]
+    if brotli is not None:
+        compressed.insert(0, ('br', brotli.compress(spec_bytes, quality=11)))
+    spec_variants = {
+        encoding: (body, {
+            'Content-Encoding': encoding,
+            'ETag': f'"{spec_digest}-{encoding}"',
+            'Vary': 'Accept-Encoding'
+        })
+        for encoding, body in compressed
+    }
+    spec_encodings = tuple(spec_variants)
+    spec_headers = {'ETag': f'"{spec_digest}"', 'Vary': 'Accept-Encoding'}
 
     # OpenAPI specification endpoint
     async def openapi_json(request):
-        return web.json_response(spec)
+        encoding = _pick_encoding(
+            request.headers.get('Accept-Encoding', ''), spec_encodings
+        )
+        if encoding is None:
+            body, headers = spec_bytes, spec_headers
+        else:
+            body, headers = spec_variants[encoding]
+
+        if request.headers.get('If-None-Match') == headers['ETag']:
+            return web.Response(
+                status=304,
+                headers={'ETag': headers['ETag'], 'Vary': 'Accept-Encoding'}
+            )
+        return web.Response(
+            body=body,
+            content_type='application/json',
+            headers=headers
+        )
 
     # Swagger UI
     async def swagger_ui(request):
-        html = get_swagger_ui_html()
-        return web.Response(text=html, content_type='text/html')
+        return web.Response(text=swagger_html, content_type='text/html')
 
     # ReDoc
     async def redoc_ui(request):
-        html = get_redoc_html()
-        return web.Response(text=html, content_type='text/html')
+        return web.Response(text=redoc_html, content_type='text/html')
 
     # Health check
     async def health_check(request):
-        return web.json_response({"status": "healthy"})
+        return web.Response(
+            body=_HEALTH_BYTES,
+            content_type='application/json',
+            headers={'Cache-Control': 'no-cache'}
+        )
 
     # Add routes
     app.router.add_get('/api/openapi.json', openapi_json)
@@ -22,43 +22,80 @@ Usage:
 
 import logging
 import logging.handlers
-import json
+import atexit
+import copy
+import queue
 import sys
+import time
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, Dict, Any
-import traceback
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Tuple
+
+import orjson
+
+
+def _encode_log(log_data: Dict[str, Any]) -> str:
+    """Encode a log entry as a JSON line"""
+    return orjson.dumps(log_data, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+
+# Background listeners writing log files, keyed by logger name
+_file_listeners: Dict[str, logging.handlers.QueueListener] = {}
 
 
 class JSONFormatter(logging.Formatter):
     """JSON log formatter for structured logging"""
 
+    # (whole second, ISO prefix) of the last formatted timestamp
+    _ts_cache: Tuple[Optional[int], str] = (None, "")
+
+    def _format_timestamp(self, created: float) -> str:
+        """Format a record time as ISO 8601 UTC with microseconds"""
+
+        # Bursts of records share the same second, so only the sub-second
+        # part needs formatting for most of them
+        second = int(created)
+        cached_second, prefix = self._ts_cache
+        if cached_second != second:
+            prefix = datetime.fromtimestamp(
+                second, tz=timezone.utc
+            ).strftime("%Y-%m-%dT%H:%M:%S")
+            self._ts_cache = (second, prefix)
+        return f"{prefix}.{int((created - second) * 1e6):06d}Z"
+
     def format(self, record: logging.LogRecord) -> str:
         """Format log record as JSON"""
 
         log_data = {
-            "timestamp": datetime.utcfromtimestamp(record.created).isoformat() + "Z",
+            "timestamp": self._format_timestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
-            "message": record.getMessage(),
+            # Plain string messages without args need no %-formatting
+            "message": record.msg
+            if not record.args and isinstance(record.msg, str)
+            else record.getMessage(),
             "module": record.module,
             "function": record.funcName,
             "line": record.lineno,
         }
 
         # Add extra fields
-        if hasattr(record, "extra") and isinstance(record.extra, dict):
-            log_data.update(record.extra)
+        extra = getattr(record, "extra", None)
+        if extra and isinstance(extra, dict):
+            log_data.update(extra)
 
         # Add exception info
         if record.exc_info:
+            # Share the stdlib traceback cache with other handlers of the record
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
             log_data["exception"] = {
                 "type": record.exc_info[0].__name__,
                 "message": str(record.exc_info[1]),
-                "traceback": traceback.format_exception(*record.exc_info)
+                "traceback": record.exc_text
             }
 
-        return json.dumps(log_data)
+        return _encode_log(log_data)
 
 
 class ColoredFormatter(logging.Formatter):
@@ -73,19 +110,34 @@ class ColoredFormatter(logging.Formatter):
     }
     RESET = '\033[0m'
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Colored level names are fixed, so build them once
+        self._colored = {
+            level: f"{color}{level}{self.RESET}"
+            for level, color in self.COLORS.items()
+        }
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        """Render the format string with a colored level name"""
+
+        # Color a shallow copy of the record so handlers sharing it (e.g. a
+        # plain file handler) still see the bare level name
+        colored = copy.copy(record)
+        colored.levelname = self._colored.get(record.levelname, record.levelname)
+        return super().formatMessage(colored)
+
     def format(self, record: logging.LogRecord) -> str:
         """Format log record with colors"""
 
-        color = self.COLORS.get(record.levelname, self.RESET)
-        record.levelname = f"{color}{record.levelname}{self.RESET}"
-
         # Format message
         message = super().format(record)
 
         # Add extra fields
-        if hasattr(record, "extra") and isinstance(record.extra, dict):
+        extra = getattr(record, "extra", None)
+        if extra and isinstance(extra, dict):
             extra_str = " ".join(
-                f"{k}={v}" for k, v in record.extra.items()
+                f"{k}={v}" for k, v in extra.items()
             )
             message += f" [{extra_str}]"
 
@@ -95,23 +147,44 @@ class ColoredFormatter(logging.Formatter):
 class PerformanceFilter(logging.Filter):
     """Filter for performance metrics"""
 
-    def __init__(self):
-        super().__init__()
-        self.request_times = {}
+    __slots__ = ()
 
     def filter(self, record: logging.LogRecord) -> bool:
         """Add timing information to logs"""
 
-        if hasattr(record, "duration_ms"):
-            # Highlight slow requests
-            if record.duration_ms > 1000:
-                if not hasattr(record, "extra"):
-                    record.extra = {}
-                record.extra["slow"] = True
+        duration_ms = getattr(record, "duration_ms", None)
+        # Highlight slow requests
+        if duration_ms is not None and duration_ms > 1000:
+            if not hasattr(record, "extra"):
+                record.extra = {}
+            record.extra["slow"] = True
 
         return True
 
 
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler for a listener running in the same process"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock prepare() pre-formats the record and drops exc_info,
+        # which would strip exceptions from JSON output. Only the message
+        # needs merging here since the record never leaves the process.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _stop_file_listeners():
+    """Flush and stop all background file listeners"""
+    while _file_listeners:
+        _, listener = _file_listeners.popitem()
+        listener.stop()
+
+
+atexit.register(_stop_file_listeners)
+
+
 def setup_enhanced_logger(
     name: str = "comfyui",
     level: int = logging.INFO,
@@ -142,6 +215,9 @@ def setup_enhanced_logger(
 
     # Clear existing handlers
     logger.handlers.clear()
+    listener = _file_listeners.pop(name, None)
+    if listener is not None:
+        listener.stop()
 
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
@@ -184,11 +260,22 @@ def setup_enhanced_logger(
             )
 
         file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
 
-    # Add performance filter
-    perf_filter = PerformanceFilter()
-    logger.addFilter(perf_filter)
+        # Writes and rotation happen on the listener thread, so logging
+        # calls only pay for a queue put
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(
+            log_queue, file_handler, respect_handler_level=True
+        )
+        listener.start()
+        _file_listeners[name] = listener
+        logger.addHandler(_LocalQueueHandler(log_queue))
+
+    # Slow-operation tagging only applies to timing records, which are
+    # logged through the dedicated perf child logger
+    perf_logger = logging.getLogger(f"{name}.perf")
+    if not any(isinstance(f, PerformanceFilter) for f in perf_logger.filters):
+        perf_logger.addFilter(PerformanceFilter())
 
     return logger
 
@@ -196,6 +283,8 @@ def setup_enhanced_logger(
 class LogContext:
     """Context manager for structured logging"""
 
+    __slots__ = ('logger', 'operation', 'context', 'start_time')
+
     def __init__(self, logger: logging.Logger, operation: str, **kwargs):
         """
         Initialize log context
@@ -211,17 +300,18 @@ class LogContext:
             "operation": operation,
             **kwargs
         }
-        self.start_time = datetime.utcnow()
+        self.start_time = time.monotonic_ns()
 
     def __enter__(self):
-        self.logger.info(
-            f"Starting {self.operation}",
-            extra=self.context
-        )
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(
+                f"Starting {self.operation}",
+                extra=self.context
+            )
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        duration = (datetime.utcnow() - self.start_time).total_seconds()
+        duration = (time.monotonic_ns() - self.start_time) / 1e9
 
         if exc_type:
             self.logger.error(
@@ -233,7 +323,7 @@ class LogContext:
                 },
                 exc_info=(exc_type, exc_val, exc_tb)
             )
-        else:
+        elif self.logger.isEnabledFor(logging.INFO):
             self.logger.info(
                 f"Completed {self.operation}",
                 extra={
@@ -246,23 +336,38 @@ class LogContext:
 class MetricsLogger:
     """Logger for performance metrics"""
 
+    __slots__ = ('logger', 'metrics')
+
     def __init__(self, logger: logging.Logger):
-        self.logger = logger
-        self.metrics = {}
+        # Log through the perf child so only these records hit PerformanceFilter
+        self.logger = logging.getLogger(f"{logger.name}.perf")
+        # name -> (value, unit, epoch timestamp); a metric recorded again
+        # replaces the earlier value, so memory is one tuple per name
+        self.metrics: Dict[str, Tuple[float, str, float]] = {}
 
     def record_metric(self, name: str, value: float, unit: str = ""):
         """Record a metric"""
-        self.metrics[name] = {
-            "value": value,
-            "unit": unit,
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        self.metrics[name] = (value, unit, time.time())
 
     def log_metrics(self):
         """Log all recorded metrics"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            self.metrics.clear()
+            return
+
+        metrics = {
+            name: {
+                "value": value,
+                "unit": unit,
+                "timestamp": datetime.fromtimestamp(
+                    timestamp, tz=timezone.utc
+                ).isoformat()
+            }
+            for name, (value, unit, timestamp) in self.metrics.items()
+        }
         self.logger.info(
             "Performance metrics",
-            extra={"metrics": self.metrics}
+            extra={"metrics": metrics}
         )
         self.metrics.clear()
 
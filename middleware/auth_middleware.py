@@ -18,18 +18,86 @@ Usage:
 """
 
 import logging
-import json
 import secrets
 import hashlib
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+import heapq
+import hmac
+import base64
+import binascii
+import time
+from calendar import timegm
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
 from functools import wraps
 
 import jwt
+import orjson
 from aiohttp import web
 
 logger = logging.getLogger(__name__)
 
+_BEARER = 'Bearer '
+_BEARER_LEN = len(_BEARER)
+
+# Bodies of the middleware's 401 responses, encoded once
+_MISSING_TOKEN_BODY = b'{"error":"Unauthorized","message":"Missing authentication token"}'
+_INVALID_TOKEN_BODY = b'{"error":"Unauthorized","message":"Invalid or expired token"}'
+_AUTH_REQUIRED_BODY = b'{"error":"Unauthorized","message":"Authentication required"}'
+
+
+def _json_response(data: Any, status: int = 200) -> web.Response:
+    """JSON response encoded with orjson"""
+    return web.Response(
+        body=orjson.dumps(data),
+        status=status,
+        content_type='application/json'
+    )
+
+
+def _b64url_encode(data: bytes) -> bytes:
+    """Base64url-encode without padding, as used in JWT segments"""
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def _b64url_decode(data: bytes) -> bytes:
+    """Decode an unpadded base64url JWT segment"""
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+def _numeric_claim(payload: Dict[str, Any], claim: str) -> float:
+    """Read a NumericDate claim, rejecting non-numeric values like PyJWT"""
+    value = payload[claim]
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise jwt.DecodeError(f"The {claim} claim must be a number")
+    return value
+
+
+def _token_key(token: str) -> bytes:
+    """Digest used to index tokens without keeping the raw token around"""
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
+
+def _revocation_key(token: str, payload: Dict[str, Any]) -> str:
+    """Key a verified token is revoked under: its jti, else its digest"""
+    jti = payload.get('jti')
+    if isinstance(jti, str):
+        return jti
+    return _token_key(token).hex()
+
+
+def _minimal_prefixes(paths: List[str]) -> Tuple[str, ...]:
+    """Reduce paths to the shortest set of prefixes matching the same URLs"""
+    prefixes: List[str] = []
+    for path in sorted(set(paths), key=len):
+        if not path.startswith(tuple(prefixes)):
+            prefixes.append(path)
+    return tuple(prefixes)
+
+
+# Header of every HS256 token this module issues (same bytes PyJWT emits)
+_HS256_HEADER_B64 = _b64url_encode(b'{"alg":"HS256","typ":"JWT"}')
+
 
 class AuthConfig:
     """Authentication configuration"""
@@ -53,16 +121,100 @@ class AuthConfig:
         self.require_auth = require_auth
         self.users: Dict[str, Dict[str, Any]] = {}
 
-        # Log secret key for development (NEVER in production)
-        logger.warning(f"JWT Secret Key: {self.secret_key}")
-
 
 class AuthManager:
     """Manages authentication tokens and users"""
 
-    def __init__(self, config: AuthConfig):
+    def __init__(self, config: AuthConfig,
+                 cache_max: int = 10000,
+                 cache_ttl: float = 5.0,
+                 tokens_max: int = 100000):
         self.config = config
-        self.tokens: Dict[str, Dict[str, Any]] = {}
+
+        # Issued tokens: sha256(token) -> (user_id, exp timestamp), oldest first
+        self.tokens: OrderedDict[bytes, Tuple[str, float]] = OrderedDict()
+        self._tokens_max = tokens_max
+        # Revoked tokens: jti -> exp timestamp, independent of the registry
+        # above. Entries are only needed until the token would have expired.
+        self._revoked: Dict[str, float] = {}
+        # Min-heap of (exp, jti) so pruning pops from the front
+        self._revoked_expiry: List[Tuple[float, str]] = []
+
+        # Recently verified tokens: sha256(token) -> (expires_at, payload).
+        # Keyed by digest so raw tokens are not kept around in memory.
+        self._verify_cache: OrderedDict[bytes, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._cache_max = cache_max
+        self._cache_ttl = cache_ttl
+
+        # HS256 tokens are signed and checked directly with hmac.digest
+        self._fast_hs256 = config.algorithm == "HS256"
+        self._key_bytes = config.secret_key.encode('utf-8')
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        """Compute the HS256 signature of a JWT signing input"""
+        return hmac.digest(self._key_bytes, signing_input, 'sha256')
+
+    def _encode_hs256(self, payload: Dict[str, Any]) -> str:
+        """Encode and sign an HS256 JWT"""
+        claims = dict(payload)
+        for claim in ('exp', 'iat', 'nbf'):
+            if isinstance(claims.get(claim), datetime):
+                claims[claim] = timegm(claims[claim].utctimetuple())
+
+        signing_input = (
+            _HS256_HEADER_B64 + b'.' + _b64url_encode(orjson.dumps(claims))
+        )
+        signature = _b64url_encode(self._sign(signing_input))
+        return (signing_input + b'.' + signature).decode('ascii')
+
+    def _decode_hs256(self, token: str) -> Dict[str, Any]:
+        """
+        Verify and decode an HS256 JWT
+
+        Raises the same jwt exceptions as jwt.decode. Tokens whose header
+        differs from the one issued here are handed to PyJWT unchanged.
+        """
+        segments = token.encode('utf-8').split(b'.')
+        if len(segments) != 3 or segments[0] != _HS256_HEADER_B64:
+            return jwt.decode(token, self.config.secret_key, algorithms=["HS256"])
+        header_b64, payload_b64, signature_b64 = segments
+
+        # Compare against the canonical encoding of the expected signature,
+        # so padding, junk characters or spare low bits in the last
+        # character never let a second spelling of the same token through
+        expected = _b64url_encode(self._sign(header_b64 + b'.' + payload_b64))
+        if not hmac.compare_digest(signature_b64, expected):
+            raise jwt.InvalidSignatureError("Signature verification failed")
+
+        try:
+            payload = orjson.loads(_b64url_decode(payload_b64))
+        except (binascii.Error, ValueError):
+            raise jwt.DecodeError("Invalid payload")
+        if not isinstance(payload, dict):
+            raise jwt.DecodeError("Invalid payload string: must be a json object")
+
+        # Same registered-claim checks jwt.decode applies by default
+        now = time.time()
+        if 'exp' in payload and _numeric_claim(payload, 'exp') <= now:
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        if 'nbf' in payload and _numeric_claim(payload, 'nbf') > now:
+            raise jwt.ImmatureSignatureError("The token is not yet valid (nbf)")
+        if 'iat' in payload and _numeric_claim(payload, 'iat') > now:
+            raise jwt.ImmatureSignatureError("The token is not yet valid (iat)")
+        if 'aud' in payload:
+            raise jwt.InvalidAudienceError("Invalid audience")
+
+        return payload
+
+    def _decode(self, token: str) -> Dict[str, Any]:
+        """Verify and decode a token, raising jwt exceptions on failure"""
+        if self._fast_hs256:
+            return self._decode_hs256(token)
+        return jwt.decode(
+            token,
+            self.config.secret_key,
+            algorithms=[self.config.algorithm]
+        )
 
     def generate_token(self, user_id: str, **kwargs) -> str:
         """
@@ -74,28 +226,46 @@ class AuthManager:
 
         Returns:
             JWT token string
+
+        Raises:
+            RuntimeError: If tokens_max unexpired tokens are revoked.
+                Revocations are never dropped early, so the list is kept
+                bounded by refusing new tokens until some of them expire.
         """
+        if len(self._revoked) >= self._tokens_max:
+            self._prune_revoked()
+            if len(self._revoked) >= self._tokens_max:
+                raise RuntimeError("Revocation list is full, not issuing tokens")
+
+        # NumericDate claims (RFC 7519) straight from one clock read
+        now = int(time.time())
         payload = {
             'user_id': user_id,
-            'iat': datetime.utcnow(),
-            'exp': datetime.utcnow() + timedelta(hours=self.config.token_expiry_hours),
+            'iat': now,
+            'exp': now + self.config.token_expiry_hours * 3600,
+            # Unique per token, so revoking one never hits another issued
+            # to the same user within the same second
+            'jti': secrets.token_urlsafe(16),
             **kwargs
         }
 
-        token = jwt.encode(
-            payload,
-            self.config.secret_key,
-            algorithm=self.config.algorithm
-        )
+        if self._fast_hs256:
+            token = self._encode_hs256(payload)
+        else:
+            token = jwt.encode(
+                payload,
+                self.config.secret_key,
+                algorithm=self.config.algorithm
+            )
 
         # Store token metadata
-        self.tokens[token] = {
-            'user_id': user_id,
-            'created': datetime.utcnow().isoformat(),
-            'expires': payload['exp'].isoformat()
-        }
+        exp = payload['exp']
+        if isinstance(exp, datetime):
+            exp = timegm(exp.utctimetuple())
+        self._prune_tokens()
+        self.tokens[_token_key(token)] = (user_id, exp)
 
-        logger.info(f"Token generated for user: {user_id}")
+        logger.info("Token generated for user: %s", user_id)
         return token
 
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
@@ -106,28 +276,83 @@ class AuthManager:
             token: JWT token string
 
         Returns:
-            Decoded payload or None if invalid
+            Decoded payload or None if invalid. Each call returns its own
+            dict, so callers may modify it without affecting later requests.
         """
+        key = _token_key(token)
+        now = time.time()
+
+        cached = self._verify_cache.get(key)
+        if cached is not None:
+            if cached[0] > now:
+                if _revocation_key(token, cached[1]) in self._revoked:
+                    logger.warning("Revoked token used")
+                    return None
+                self._verify_cache.move_to_end(key)
+                return dict(cached[1])
+            del self._verify_cache[key]
+
         try:
-            payload = jwt.decode(
-                token,
-                self.config.secret_key,
-                algorithms=[self.config.algorithm]
-            )
+            payload = self._decode(token)
+            if _revocation_key(token, payload) in self._revoked:
+                logger.warning("Revoked token used")
+                return None
+            # Only successful verifications are cached, and never past exp
+            expires_at = now + self._cache_ttl
+            if 'exp' in payload:
+                expires_at = min(expires_at, payload['exp'])
+            self._verify_cache[key] = (expires_at, dict(payload))
+            while len(self._verify_cache) > self._cache_max:
+                self._verify_cache.popitem(last=False)
             return payload
         except jwt.ExpiredSignatureError:
-            logger.warning(f"Token expired: {token[:20]}...")
+            logger.warning("Token expired")
             return None
         except jwt.InvalidTokenError as e:
-            logger.warning(f"Invalid token: {e}")
+            logger.warning("Invalid token: %s", e)
             return None
 
     def revoke_token(self, token: str) -> bool:
-        """Revoke a token"""
-        if token in self.tokens:
-            del self.tokens[token]
-            return True
-        return False
+        """
+        Revoke a token
+
+        The token is verified first and revoked by its jti until it
+        expires, so tokens that have left the registry can still be
+        revoked. Forged, expired and already revoked tokens return False.
+        """
+        try:
+            payload = self._decode(token)
+        except jwt.InvalidTokenError:
+            return False
+        revocation_key = _revocation_key(token, payload)
+        if revocation_key in self._revoked:
+            # Already revoked; a replayed logout adds nothing
+            return False
+        exp = payload.get('exp', float('inf'))
+        self._prune_revoked()
+        self._revoked[revocation_key] = exp
+        heapq.heappush(self._revoked_expiry, (exp, revocation_key))
+        key = _token_key(token)
+        self.tokens.pop(key, None)
+        self._verify_cache.pop(key, None)
+        return True
+
+    def _prune_revoked(self):
+        """Forget revocations of tokens that have expired since"""
+        now = time.time()
+        expiry = self._revoked_expiry
+        while expiry and expiry[0][0] <= now:
+            del self._revoked[heapq.heappop(expiry)[1]]
+
+    def _prune_tokens(self):
+        """Drop expired token records, then the oldest ones if still full"""
+        now = time.time()
+        tokens = self.tokens
+        while tokens:
+            record = next(iter(tokens.values()))
+            if record[1] > now and len(tokens) < self._tokens_max:
+                break
+            tokens.popitem(last=False)
 
 
 class AuthMiddleware:
@@ -140,16 +365,33 @@ class AuthMiddleware:
 
         Args:
             config: AuthConfig instance
-            public_paths: List of paths that don't require auth
+            public_paths: List of paths that don't require auth. Entries
+                match exactly, except those ending in "/" (other than the
+                root) or "*", which match every path starting with them.
         """
         self.config = config or AuthConfig()
         self.auth_manager = AuthManager(self.config)
+        # Bound once so the per-request call skips the auth_manager hop
+        self._verify_token = self.auth_manager.verify_token
         self.public_paths = public_paths or [
             '/health',
             '/api/auth/login',
             '/api/auth/token',
             '/',
         ]
+        # Exact entries are one frozenset lookup; prefix entries go through
+        # a single tuple startswith, minus those covered by a shorter one.
+        # "/" is exact, otherwise it would make every path public.
+        exact, prefixes = [], []
+        for path in self.public_paths:
+            if path.endswith('*'):
+                prefixes.append(path[:-1])
+            elif path != '/' and path.endswith('/'):
+                prefixes.append(path)
+            else:
+                exact.append(path)
+        self._public_exact = frozenset(exact)
+        self._public_prefixes = _minimal_prefixes(prefixes)
 
     @web.middleware
     async def middleware_handler(self, request: web.Request,
@@ -163,41 +405,52 @@ class AuthMiddleware:
         3. api_token query parameter
         """
 
-        # Skip auth for public paths
-        if any(request.path.startswith(path) for path in self.public_paths):
+        path = request.path
+
+        # Skip auth for public paths (nothing below is used then, not even
+        # the parsed query string)
+        if path in self._public_exact or path.startswith(self._public_prefixes):
             return await handler(request)
 
+        # Other paths outside /api/ are only enforced under require_auth.
+        # They still get user_id from a valid token, for @require_auth.
+        enforced = self.config.require_auth or path.startswith('/api/')
+
         # Extract token from Authorization header
-        auth_header = request.headers.get('Authorization', '')
-        token = None
+        headers = request.headers
+        auth_header = headers.get('Authorization')
 
-        if auth_header.startswith('Bearer '):
-            token = auth_header[7:]
-        elif 'X-API-Key' in request.headers:
+        if auth_header is not None and auth_header[:_BEARER_LEN] == _BEARER:
+            token = auth_header[_BEARER_LEN:]
+        elif (api_key := headers.get('X-API-Key')) is not None:
             # For simple API key auth
-            token = request.headers.get('X-API-Key')
+            token = api_key
         else:
             # Try query parameter
             token = request.query.get('api_token')
 
-        # Verify token if required
-        if self.config.require_auth or request.path.startswith('/api/'):
-            if not token:
-                return web.json_response(
-                    {'error': 'Unauthorized', 'message': 'Missing authentication token'},
-                    status=401
-                )
-
-            payload = self.auth_manager.verify_token(token)
-            if not payload:
-                return web.json_response(
-                    {'error': 'Unauthorized', 'message': 'Invalid or expired token'},
-                    status=401
-                )
-
-            # Store user info in request
-            request['user_id'] = payload.get('user_id')
-            request['auth_payload'] = payload
+        if not token:
+            if not enforced:
+                return await handler(request)
+            return web.Response(
+                body=_MISSING_TOKEN_BODY,
+                status=401,
+                content_type='application/json'
+            )
+
+        payload = self._verify_token(token)
+        if not payload:
+            if not enforced:
+                return await handler(request)
+            return web.Response(
+                body=_INVALID_TOKEN_BODY,
+                status=401,
+                content_type='application/json'
+            )
+
+        # Store user info in request
+        request['user_id'] = payload.get('user_id')
+        request['auth_payload'] = payload
 
         # Call handler
         return await handler(request)
@@ -215,6 +468,13 @@ def require_auth(f):
     """
     Decorator for protecting routes
 
+    AuthMiddleware already rejects unauthenticated requests to /api/ paths
+    (and to every non-public path when require_auth is set), so handlers
+    there don't need this. Other non-public paths are let through, with
+    user_id set when the request carries a valid token; use this on routes
+    there that must stay protected while global auth is off. The middleware
+    never sets user_id on public paths, so do not list such routes there.
+
     Usage:
         @require_auth
         async def my_endpoint(request):
@@ -224,9 +484,10 @@ def require_auth(f):
     @wraps(f)
     async def decorated(request, *args, **kwargs):
         if 'user_id' not in request:
-            return web.json_response(
-                {'error': 'Unauthorized', 'message': 'Authentication required'},
-                status=401
+            return web.Response(
+                body=_AUTH_REQUIRED_BODY,
+                status=401,
+                content_type='application/json'
             )
         return await f(request, *args, **kwargs)
     return decorated
@@ -244,7 +505,7 @@ async def handle_login(request):
     }
     """
     try:
-        data = await request.json()
+        data = orjson.loads(await request.read())
         username = data.get('username')
         password = data.get('password')
 
@@ -259,19 +520,19 @@ async def handle_login(request):
         auth_manager = request.app.get('auth_manager')
         token = auth_manager.generate_token(username)
 
-        return web.json_response({
+        return _json_response({
             'token': token,
             'user_id': username,
             'token_type': 'Bearer'
         })
 
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         return web.json_response(
             {'error': 'Invalid JSON'},
             status=400
         )
     except Exception as e:
-        logger.error(f"Login error: {e}")
+        logger.error("Login error: %s", e)
         return web.json_response(
             {'error': 'Internal server error'},
             status=500
@@ -288,7 +549,7 @@ async def handle_refresh_token(request):
     }
     """
     try:
-        data = await request.json()
+        data = orjson.loads(await request.read())
         old_token = data.get('token')
 
         if not old_token:
@@ -313,14 +574,14 @@ async def handle_refresh_token(request):
         # Optionally revoke old token
         auth_manager.revoke_token(old_token)
 
-        return web.json_response({
+        return _json_response({
             'token': new_token,
             'user_id': user_id,
             'token_type': 'Bearer'
         })
 
     except Exception as e:
-        logger.error(f"Token refresh error: {e}")
+        logger.error("Token refresh error: %s", e)
         return web.json_response(
             {'error': 'Internal server error'},
             status=500
@@ -336,21 +597,21 @@ async def handle_logout(request):
     """
     try:
         auth_header = request.headers.get('Authorization', '')
-        if not auth_header.startswith('Bearer '):
+        if auth_header[:_BEARER_LEN] != _BEARER:
             return web.json_response(
                 {'error': 'Invalid authorization header'},
                 status=400
             )
 
-        token = auth_header[7:]
+        token = auth_header[_BEARER_LEN:]
         auth_manager = request.app.get('auth_manager')
         auth_manager.revoke_token(token)
 
-        logger.info(f"User {request.get('user_id')} logged out")
+        logger.info("User %s logged out", request.get('user_id'))
         return web.json_response({'message': 'Logged out successfully'})
 
     except Exception as e:
-        logger.error(f"Logout error: {e}")
+        logger.error("Logout error: %s", e)
         return web.json_response(
             {'error': 'Internal server error'},
             status=500
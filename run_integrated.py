@@ -62,17 +62,31 @@ def integrate_enterprise_features(app):
     logger.info("Integrating enterprise features...")
 
     # Add authentication middleware
+    # Entries match exactly; a trailing '/' or '*' makes a prefix match.
+    # Non-/api/ paths are only checked when AUTH_REQUIRE_AUTH=true.
     public_paths = [
         '/',
+        '/health',
         '/api/auth/login',
         '/api/auth/logout',
         '/api/docs',
         '/api/redoc',
         '/api/openapi.json',
+        # Frontend static files
+        '/assets/',
+        '/extensions/',
+        '/templates/',
+        '/fonts/',
+        '/favicon.ico',
         '/ws',  # WebSocket endpoint
         '/view',  # Image view endpoint
-        '/upload',  # Upload endpoint
+        '/api/view',
+        '/upload/',  # Upload endpoints (prefix match)
+        '/api/upload/',
     ]
+    if not auth_config.require_auth:
+        # Optional auth keeps all of ComfyUI's own /api/ routes open
+        public_paths.append('/api/*')
 
     auth = AuthMiddleware(
         config=auth_config,
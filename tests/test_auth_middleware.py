@@ -0,0 +1,153 @@
+import asyncio
+import time
+
+import jwt
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from middleware.auth_middleware import AuthConfig, AuthManager, AuthMiddleware, require_auth
+
+SECRET = 'test-secret-key-with-at-least-32-bytes'
+B64URL_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'
+
+
+@pytest.fixture
+def manager():
+    return AuthManager(AuthConfig(secret_key=SECRET))
+
+
+@pytest.fixture
+def token(manager):
+    return manager.generate_token('alice', role='admin')
+
+
+def sibling_spellings(token):
+    """Same token with the unused low bits of the last signature character changed"""
+    index = B64URL_ALPHABET.index(token[-1])
+    return [
+        token[:-1] + B64URL_ALPHABET[(index & ~3) | bits]
+        for bits in range(4)
+        if (index & ~3) | bits != index
+    ]
+
+
+def non_canonical_spellings(token):
+    header, payload, signature = token.split('.')
+    return [
+        token + '=',
+        token + '======',
+        f'{header}.{payload}.{signature[:10]}$$$${signature[10:]}',
+        f'{header}.{payload}.{signature[:10]}!!!{signature[10:]}',
+        f'{header}.{payload}.{signature}A',
+        *sibling_spellings(token),
+    ]
+
+
+def test_issued_token_verifies(manager, token):
+    payload = manager.verify_token(token)
+    assert payload['user_id'] == 'alice'
+    assert payload['role'] == 'admin'
+    assert payload == jwt.decode(token, SECRET, algorithms=['HS256'])
+
+
+def test_pyjwt_token_verifies(manager):
+    token = jwt.encode({'user_id': 'bob', 'exp': int(time.time()) + 60}, SECRET, algorithm='HS256')
+    assert manager.verify_token(token)['user_id'] == 'bob'
+
+
+def test_non_canonical_signature_rejected(manager, token):
+    for altered in non_canonical_spellings(token):
+        assert manager.verify_token(altered) is None, altered
+
+
+def test_tampered_payload_rejected(manager, token):
+    header, _, signature = token.split('.')
+    forged = jwt.encode({'user_id': 'mallory'}, 'other-secret-key-with-at-least-32-bytes', algorithm='HS256')
+    assert manager.verify_token(f'{header}.{forged.split(".")[1]}.{signature}') is None
+
+
+def test_wrong_key_rejected(manager):
+    token = jwt.encode({'user_id': 'mallory'}, 'other-secret-key-with-at-least-32-bytes', algorithm='HS256')
+    assert manager.verify_token(token) is None
+
+
+def test_malformed_tokens_rejected(manager, token):
+    header, payload, signature = token.split('.')
+    for malformed in ['', 'abc', f'{header}.{payload}', f'{header}.{payload}.', token + '.x']:
+        assert manager.verify_token(malformed) is None, malformed
+
+
+def test_expired_token_rejected(manager):
+    token = manager.generate_token('alice', exp=int(time.time()) - 1)
+    assert manager.verify_token(token) is None
+
+
+def test_revoked_token_stays_revoked_when_respelled(manager, token):
+    assert manager.verify_token(token) is not None
+    manager.revoke_token(token)
+    assert manager.verify_token(token) is None
+    for altered in non_canonical_spellings(token):
+        assert manager.verify_token(altered) is None, altered
+
+
+def test_revoke_after_registry_eviction():
+    manager = AuthManager(AuthConfig(secret_key=SECRET), tokens_max=3)
+    token = manager.generate_token('alice')
+    for _ in range(10):
+        manager.generate_token('bob')
+    assert manager.revoke_token(token) is True
+    assert manager.verify_token(token) is None
+
+
+def test_revoke_rejects_unverified_tokens(manager, token):
+    forged = jwt.encode({'user_id': 'mallory', 'jti': 'x'}, 'other-secret-key-with-at-least-32-bytes', algorithm='HS256')
+    assert manager.revoke_token(forged) is False
+    assert manager.revoke_token('not-a-token') is False
+    assert not manager._revoked
+    assert manager.revoke_token(token) is True
+    assert manager.revoke_token(token) is False
+    assert len(manager._revoked) == 1
+
+
+def test_full_revocation_list_refuses_new_tokens():
+    manager = AuthManager(AuthConfig(secret_key=SECRET), tokens_max=3)
+    revoked = []
+    for _ in range(3):
+        revoked.append(manager.generate_token('alice'))
+        assert manager.revoke_token(revoked[-1]) is True
+    with pytest.raises(RuntimeError):
+        manager.generate_token('alice')
+    for token in revoked:
+        assert manager.verify_token(token) is None
+
+
+def test_expired_revocations_are_pruned():
+    manager = AuthManager(AuthConfig(secret_key=SECRET), tokens_max=3)
+    for _ in range(3):
+        manager.revoke_token(manager.generate_token('alice'))
+    # Age the stored expiries instead of sleeping through them
+    manager._revoked = dict.fromkeys(manager._revoked, 0)
+    manager._revoked_expiry = [(0, key) for key in manager._revoked]
+    assert manager.verify_token(manager.generate_token('alice')) is not None
+    assert not manager._revoked
+
+
+def test_require_auth_outside_api_without_global_auth():
+    auth = AuthMiddleware(AuthConfig(secret_key=SECRET))
+    token = auth.generate_token('alice')
+
+    @require_auth
+    async def private(request):
+        return web.Response(text=request['user_id'])
+
+    async def run():
+        app = web.Application(middlewares=[auth.middleware_handler])
+        app.router.add_get('/private', private)
+        async with TestClient(TestServer(app)) as client:
+            anonymous = await client.get('/private')
+            invalid = await client.get('/private', headers={'Authorization': 'Bearer invalid'})
+            valid = await client.get('/private', headers={'Authorization': f'Bearer {token}'})
+            return anonymous.status, invalid.status, valid.status, await valid.text()
+
+    assert asyncio.run(run()) == (401, 401, 200, 'alice')
@@ -0,0 +1,21 @@
+import pytest
+
+from api_server.openapi_spec import _pick_encoding
+
+
+@pytest.mark.parametrize('accept_encoding, expected', [
+    ('', None),
+    ('gzip', 'gzip'),
+    ('GZIP', 'gzip'),
+    ('gzip, br', 'br'),
+    ('gzip;q=0, br', 'br'),
+    ('gzip;q=0.5, br;q=0', 'gzip'),
+    ('gzip;q=0, br;q=0.000', None),
+    ('xbrx, notgzip', None),
+    ('*', 'br'),
+    ('*;q=0', None),
+    ('br;q=0, *', 'gzip'),
+    ('identity', None),
+])
+def test_pick_encoding(accept_encoding, expected):
+    assert _pick_encoding(accept_encoding, ('br', 'gzip')) == expected